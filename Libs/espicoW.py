@@ -5,21 +5,230 @@ Supports: Station mode, AP mode, TCP/UDP connections, HTTP requests
 """
 
 from machine import UART, Pin
+from micropython import const
+from array import array
+import asyncio
+import re
+import select
 import time
 
+# Bound once so polling loops avoid a module attribute lookup per call
+_ticks_ms = time.ticks_ms
+_ticks_diff = time.ticks_diff
+
+def _scan_ipd(buf, start, end):
+    """Index of b"+IPD," in buf[start:end], or -1"""
+    idx = bytes(memoryview(buf)[start:end]).find(b"+IPD,")
+    return idx if idx == -1 else start + idx
+
+def _find_in(buf, start, end, needle):
+    """Index of needle in buf[start:end], or -1"""
+    idx = bytes(memoryview(buf)[start:end]).find(needle)
+    return idx if idx == -1 else start + idx
+
+def _atoi(buf, start, end):
+    """Decimal number at the start of buf[start:end], or -1 if there is none"""
+    i = start
+    n = 0
+    while i < end and 0x30 <= buf[i] <= 0x39:
+        n = n * 10 + buf[i] - 0x30
+        i += 1
+    return n if i > start else -1
+
+try:
+    # Native versions of the byte scanners when espicoW_native.py is installed
+    from espicoW_native import scan_ipd as _scan_ipd, find as _find_in, atoi as _atoi
+except (ImportError, SyntaxError):
+    pass
+
+# WiFi modes
+_MODE_STATION = const(1)
+_MODE_AP = const(2)
+_MODE_BOTH = const(3)
+
+# UDP connection type as sent in AT+CIPSTART, which takes a local port
+_TYPE_UDP = b"UDP"
+
+# Response record patterns, compiled once at import
+_CWLAP_RE = re.compile(r'\+CWLAP:\((\d+),"([^"]*)",(-?\d+),"([^"]*)",(\d+)')
+_CIPSTATUS_RE = re.compile(r'\+CIPSTATUS:(\d+),"([^"]*)","([^"]*)",(\d+),(\d+),(\d+)')
+
+# +IPD parser states
+_IPD_SEEK = const(0)
+_IPD_HDR = const(1)
+_IPD_BODY = const(2)
+
+# How long get_ip() answers from its cache before asking the module again
+_IP_CACHE_MS = const(1000)
+
+# Bounds of the adaptive default command timeout, which adds 4x the
+# average reply time to the floor
+_CMD_TIMEOUT_MIN = const(1000)
+_CMD_TIMEOUT_MAX = const(5000)
+
+# Size of the shared receive buffer; it only grows for oversized responses
+_RXBUF_SIZE = const(2048)
+
+class Networks:
+    """
+    Scan results stored as parallel arrays, one entry per network
+    
+    Indexing, slicing and iterating give the same dicts scan() always
+    returned ('encryption', 'ssid', 'rssi', 'mac', 'channel'), but they
+    are only built when accessed. Use the arrays directly for bulk work.
+    """
+    
+    def __init__(self):
+        self.encryptions = array('B')
+        self.ssids = []
+        self.rssis = array('h')
+        self.macs = []
+        self.channels = array('B')
+    
+    def _add(self, encryption, ssid, rssi, mac, channel):
+        self.encryptions.append(encryption)
+        self.ssids.append(ssid)
+        self.rssis.append(rssi)
+        self.macs.append(mac)
+        self.channels.append(channel)
+    
+    def __len__(self):
+        return len(self.ssids)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self.ssids))[index]]
+        return {
+            'encryption': self.encryptions[index],
+            'ssid': self.ssids[index],
+            'rssi': self.rssis[index],
+            'mac': self.macs[index],
+            'channel': self.channels[index]
+        }
+    
+    def __iter__(self):
+        for i in range(len(self.ssids)):
+            yield self[i]
+    
+    def sort(self, key='rssi', reverse=False):
+        """
+        Sort in place
+        
+        Args:
+            key: Field name such as 'rssi' (compares the array values
+                directly), or a function of the entry dict like list.sort()
+            reverse: Sort descending
+        """
+        if callable(key):
+            values = [key(net) for net in self]
+        else:
+            values = getattr(self, key + 's')
+        order = sorted(range(len(self.ssids)), key=lambda i: values[i], reverse=reverse)
+        self.encryptions = array('B', [self.encryptions[i] for i in order])
+        self.ssids = [self.ssids[i] for i in order]
+        self.rssis = array('h', [self.rssis[i] for i in order])
+        self.macs = [self.macs[i] for i in order]
+        self.channels = array('B', [self.channels[i] for i in order])
+
+class _Body:
+    """http_get() sink collecting the body, allocated once when its length is known"""
+    
+    def __init__(self):
+        self.buf = bytearray()
+        self.filled = 0
+    
+    def reserve(self, size):
+        self.buf = bytearray(size)
+    
+    def __call__(self, data):
+        end = self.filled + len(data)
+        if end <= len(self.buf):
+            self.buf[self.filled:end] = data
+        else:
+            self.buf.extend(data)
+        self.filled = end
+    
+    def value(self):
+        # Returned as is; copying it into bytes would double the peak RAM
+        if self.filled < len(self.buf):
+            # Connection dropped before Content-Length bytes arrived
+            return self.buf[:self.filled]
+        return self.buf
+
+class _Dechunker:
+    """Decodes a chunked HTTP body as it streams in, passing the data on to on_chunk"""
+    
+    def __init__(self, on_chunk):
+        self.on_chunk = on_chunk
+        self.line = bytearray()
+        self.left = 0
+        self.skip = 0
+        self.done = False
+    
+    def __call__(self, data):
+        i = 0
+        n = len(data)
+        while i < n and not self.done:
+            if self.left:
+                # Chunk data goes out as slices, never byte by byte
+                take = min(self.left, n - i)
+                self.on_chunk(data[i:i + take])
+                self.left -= take
+                i += take
+                if not self.left:
+                    self.skip = 2
+            elif self.skip:
+                # CRLF after the chunk data
+                take = min(self.skip, n - i)
+                self.skip -= take
+                i += take
+            else:
+                # Chunk size line, hex with optional ;extensions
+                c = data[i]
+                i += 1
+                if c == 0x0A:
+                    try:
+                        self.left = int(bytes(self.line).split(b";")[0], 16)
+                    except ValueError:
+                        self.left = 0
+                    self.line = bytearray()
+                    # The last chunk has size 0; trailers are ignored
+                    self.done = not self.left
+                elif c != 0x0D:
+                    self.line.append(c)
+
 class ESPicoW:
     """WiFi library for RP2040 with ESP8285 using AT commands"""
     
     # WiFi modes
-    MODE_STATION = 1
-    MODE_AP = 2
-    MODE_BOTH = 3
+    MODE_STATION = _MODE_STATION
+    MODE_AP = _MODE_AP
+    MODE_BOTH = _MODE_BOTH
     
     # Connection types
     TYPE_TCP = "TCP"
     TYPE_UDP = "UDP"
     TYPE_SSL = "SSL"
     
+    # Static AT command fragments, kept as bytes to avoid per-call encoding
+    _CRLF = b"\r\n"
+    # Commands with only numeric arguments are complete %-templates, so
+    # building one is a single bytes formatting with no concatenation
+    _CMD_CWMODE = b"AT+CWMODE=%d\r\n"
+    _CMD_CWJAP = b'AT+CWJAP="'
+    _CMD_CWSAP = b'AT+CWSAP="'
+    _CMD_CIPMUX_ON = b"AT+CIPMUX=1\r\n"
+    _CMD_CIPMUX_OFF = b"AT+CIPMUX=0\r\n"
+    _CMD_CIPSTART = b"AT+CIPSTART="
+    _CMD_CIPSEND_LINK = b"AT+CIPSEND=%d,%d\r\n"
+    _CMD_CIPSEND = b"AT+CIPSEND=%d\r\n"
+    _CMD_CIPCLOSE = b"AT+CIPCLOSE=%d\r\n"
+    _CMD_CIPDOMAIN = b'AT+CIPDOMAIN="'
+    _CMD_PING = b'AT+PING="'
+    _CMD_CWDHCP = b"AT+CWDHCP=%d,%d\r\n"
+    _CMD_SLEEP = b"AT+SLEEP=%d\r\n"
+    _CMD_UART_CUR = b"AT+UART_CUR=%d,8,1,0,0\r\n"
+    
     def __init__(self, uart_id=0, tx_pin=0, rx_pin=1, baudrate=115200, debug=False):
         """
         Initialize ESP8285 communication
@@ -32,64 +241,303 @@ class ESPicoW:
             debug: Enable debug output
         """
         self.uart = UART(uart_id, baudrate=baudrate, tx=Pin(tx_pin), rx=Pin(rx_pin))
+        self._boot_baudrate = baudrate  # rate the module returns to after reset
+        self._baudrate = baudrate
         self.debug = debug
-        self.timeout = 5000  # Default timeout in ms
+        self.timeout = None  # Default timeout in ms, None adapts it (see _cmd_timeout())
         self.connections = {}
+        self._dns_cache = {}  # host -> IP resolved with AT+CIPDOMAIN
+        self._ip_cache = None  # last get_ip() result, see _IP_CACHE_MS
+        self._ip_cache_ms = 0
+        # Receive buffer shared by every reader, filled in place with readinto()
+        self._rxbuf = bytearray(_RXBUF_SIZE)
+        self._rxmv = memoryview(self._rxbuf)
+        # Single byte scratch for reads that must not run past a prompt
+        self._rx1 = bytearray(1)
+        # Wake up as soon as the UART has data instead of sleeping blindly
+        self._poll = select.poll()
+        self._poll.register(self.uart, select.POLLIN)
+        # Drop stale bytes (boot messages etc.) in one bulk read
+        self.uart.read()
+        # Moving average of command reply times (x8 fixed point), see _cmd_timeout()
+        self._rtt_ema = 0
+        # +IPD parser state, kept across receive() calls
+        self._ipd_reset()
+        # asyncio interface state, see start_async()
+        self._rx_task = None
+        self._rx_pending = []
+        self._rx_size = 0
+        self._rx_need = 0
+        self._cmd_lines = []
+        self._link_data = {}
         
-    def _send_cmd(self, cmd, timeout=None, wait_for="OK"):
-        """Send AT command and wait for response"""
+    def _send_cmd(self, cmd, timeout=None, wait_for=b"OK"):
+        """Send AT command (str or bytes) and wait for response (wait_for as bytes or str)"""
+        self._write_cmd(cmd)
+        if timeout is None:
+            return self._wait_timed(wait_for, True)
+        return self._wait_for_token(wait_for, timeout)
+
+    def _cmd_ok(self, cmd, timeout=None):
+        """Send AT command and return whether it answered OK, without decoding the reply"""
+        self._write_cmd(cmd)
         if timeout is None:
-            timeout = self.timeout
+            return self._wait_timed(b"OK", False)
+        return self._wait_for_token(b"OK", timeout, False)
+
+    def _cmd_timeout(self):
+        """Default command timeout: self.timeout if set, else the floor plus 4x the average reply time"""
+        if self.timeout is not None:
+            return self.timeout
+        return min(_CMD_TIMEOUT_MAX, _CMD_TIMEOUT_MIN + (self._rtt_ema >> 1))
+
+    def _wait_timed(self, wait_for, decode):
+        """_wait_for_token() with the default timeout, adding the reply time to the average"""
+        timeout = self._cmd_timeout()
+        start = _ticks_ms()
+        result = self._wait_for_token(wait_for, timeout, decode)
+        elapsed = _ticks_diff(_ticks_ms(), start)
+        if elapsed < timeout:
+            # Answered (OK, ERROR or FAIL); timeouts would only skew the average
+            self._rtt_ema += elapsed - (self._rtt_ema >> 3)
+        return result
+
+    def _write_cmd(self, cmd):
+        """Write one AT command line, adding CRLF if it is missing"""
+        if isinstance(cmd, str):
+            cmd = cmd.encode()
+        if not cmd.endswith(self._CRLF):
+            cmd += self._CRLF
             
         if self.debug:
-            print(f"[TX] {cmd}")
+            print(f"[TX] {self._decode(cmd).strip()}")
             
-        self.uart.write(cmd + "\r\n")
-        start = time.ticks_ms()
-        response = b""
-        
-        while time.ticks_diff(time.ticks_ms(), start) < timeout:
-            if self.uart.any():
-                chunk = self.uart.read()
-                if chunk:
-                    response += chunk
-                
-                try:
-                    resp_str = response.decode('utf-8', 'ignore')
-                    if wait_for in resp_str or "ERROR" in resp_str or "FAIL" in resp_str:
-                        if self.debug:
-                            print(f"[RX] {resp_str}")
-                        return resp_str
-                except:
-                    # If decode fails, continue collecting data
-                    pass
-                    
-            time.sleep_ms(10)
-        
-        # Final decode attempt
-        try:
-            resp_str = response.decode('utf-8', 'ignore')
-        except:
-            resp_str = str(response)
+        self.uart.write(cmd)
+
+    def _wait_for_token(self, wait_for, timeout, decode=True):
+        """
+        Read the UART until wait_for, ERROR or FAIL arrives
+        
+        Returns:
+            What was read as str, or with decode=False just whether
+            wait_for arrived
+        """
+        # The response overwrites anything receive() left in the buffer
+        self._ipd_reset()
+        # Locals instead of attribute lookups in the polling loop
+        wait_rx = self._wait_rx
+        rx_into = self._rx_into
+        find = self._find
+        start = _ticks_ms()
+        pos = 0
+        wait_b = wait_for.encode() if isinstance(wait_for, str) else wait_for
+        # Bytes of the previous data a token split across reads can start in
+        overlap = max(len(wait_b), 5) - 1
+
+        found = False
+        matched = False
+        while wait_rx(start, timeout):
+            prev = pos
+            pos = rx_into(pos)
+            if pos > prev:
+                # Only scan the newly arrived data (plus overlap)
+                scan_start = max(0, prev - overlap)
+                found = find(wait_b, scan_start, pos) != -1
+                if (found or find(b"ERROR", scan_start, pos) != -1
+                        or find(b"FAIL", scan_start, pos) != -1):
+                    matched = True
+                    break
+
+        resp_str = self._decode(self._rxmv[:pos]) if decode or self.debug else None
+        self._rx_shrink()
+        if self.debug:
+            print(f"[RX] {resp_str}" if matched else f"[RX] Timeout: {resp_str}")
+        return resp_str if decode else found
+
+    def _send_cmds(self, cmds, timeout=None):
+        """
+        Pipeline several AT commands: one write, then wait for every OK
+        
+        If the module rejects the batch (ERROR, or "busy" while it is still
+        handling an earlier command) the commands are sent again one at a
+        time, so they must be safe to repeat. FAIL is a real answer (e.g. a
+        wrong WiFi password) and a timeout means the module is still busy
+        with the batch; both return False without resending.
+        
+        Args:
+            cmds: Complete command lines as bytes, each ending in CRLF
             
+        Returns:
+            True if every command answered OK
+        """
+        if timeout is None:
+            timeout = self._cmd_timeout()
+        if self.debug:
+            print(f"[TX] {self._decode(b''.join(cmds)).strip()}")
+        self.uart.write(b"".join(cmds))
+        self._ipd_reset()
+        wait_rx = self._wait_rx
+        rx_into = self._rx_into
+        find = self._find
+        start = _ticks_ms()
+        pos = 0
+        scan = 0
+        oks = 0
+        failed = False
+        rejected = False
+        while oks < len(cmds) and wait_rx(start, timeout):
+            prev = pos
+            pos = rx_into(pos)
+            if pos == prev:
+                continue
+            if find(b"FAIL", max(0, prev - 3), pos) != -1:
+                failed = True
+                break
+            if find(b"ERROR", max(0, prev - 4), pos) != -1 or find(b"busy", max(0, prev - 3), pos) != -1:
+                rejected = True
+                break
+            idx = find(b"OK\r\n", scan, pos)
+            while idx != -1:
+                oks += 1
+                scan = idx + 4
+                idx = find(b"OK\r\n", scan, pos)
+            # A split OK can start in the last 3 bytes
+            scan = max(scan, pos - 3)
+        
         if self.debug:
-            print(f"[RX] Timeout: {resp_str}")
-        return resp_str
+            print(f"[RX] {self._decode(self._rxmv[:pos])}")
+        self._rx_shrink()
+        if oks == len(cmds):
+            return True
+        if failed or not rejected:
+            return False
+        
+        # Let the module finish whatever it accepted, then go one by one
+        self._drain(100, timeout)
+        for cmd in cmds:
+            if not self._cmd_ok(cmd, timeout):
+                return False
+        return True
+
+    def _wait_rx(self, start, timeout):
+        """Block until the UART is readable; False once timeout ms have elapsed"""
+        remaining = timeout - _ticks_diff(_ticks_ms(), start)
+        if remaining <= 0:
+            return False
+        self._poll.poll(remaining)
+        return True
+
+    def _rx_into(self, pos):
+        """Read pending UART bytes into the receive buffer at pos, return new end"""
+        if pos == len(self._rxbuf):
+            # Full: double the buffer, keeping what was received so far
+            buf = bytearray(2 * pos)
+            buf[:pos] = self._rxbuf
+            self._rxbuf = buf
+            self._rxmv = memoryview(buf)
+        n = self.uart.readinto(self._rxmv[pos:])
+        return pos + (n or 0)
+
+    def _rx_shrink(self):
+        """Give back a receive buffer that grew past its default size"""
+        if len(self._rxbuf) > _RXBUF_SIZE:
+            self._rxbuf = bytearray(_RXBUF_SIZE)
+            self._rxmv = memoryview(self._rxbuf)
+
+    def _drain(self, quiet_ms, timeout):
+        """Discard UART input until nothing arrives for quiet_ms (at most timeout ms)"""
+        poll = self._poll.poll
+        read = self.uart.read
+        start = _ticks_ms()
+        while _ticks_diff(_ticks_ms(), start) < timeout and poll(quiet_ms):
+            read()
+
+    def _find(self, needle, start, end):
+        """Find needle in the receive buffer between start and end, or -1"""
+        return _find_in(self._rxbuf, start, end, needle)
+
+    @staticmethod
+    def _iter_matching(resp, prefix):
+        """Yield the lines of resp containing prefix, skipping all others"""
+        pos = resp.find(prefix)
+        while pos != -1:
+            start = resp.rfind('\n', 0, pos) + 1
+            end = resp.find('\n', pos)
+            if end == -1:
+                end = len(resp)
+            yield resp[start:end]
+            pos = resp.find(prefix, end)
+
+    @staticmethod
+    def _split_fields(data):
+        """Split a comma separated AT record, keeping commas inside quotes"""
+        parts = data.split(',')
+        if '"' not in data:
+            return parts
+        
+        # Rejoin pieces of quoted fields that contained commas
+        fields = []
+        pending = None
+        for part in parts:
+            if pending is not None:
+                pending += ',' + part
+                if part.count('"') % 2:
+                    fields.append(pending)
+                    pending = None
+            elif part.count('"') % 2:
+                pending = part
+            else:
+                fields.append(part)
+        if pending is not None:
+            fields.append(pending)
+        return fields
+
+    @staticmethod
+    def _decode(data):
+        """Decode raw response bytes to str"""
+        try:
+            return bytes(data).decode('utf-8', 'ignore')
+        except UnicodeError:
+            # MicroPython ignores 'ignore'; drop the non-ASCII bytes instead
+            return bytes(b for b in data if b < 0x80).decode()
     
     def reset(self):
         """Reset ESP8285 module"""
-        resp = self._send_cmd("AT+RST", timeout=3000, wait_for="ready")
-        time.sleep(2)
-        # Clear any remaining data in buffer
-        while self.uart.any():
-            self.uart.read()
-        time.sleep_ms(500)
+        self._ip_cache = None
+        if self._baudrate != self._boot_baudrate:
+            # The module restarts at its default rate, so follow it there
+            self._send_cmd("AT+RST", timeout=1000)
+            self.uart.init(baudrate=self._boot_baudrate)
+            self._baudrate = self._boot_baudrate
+            self._wait_for_token(b"ready", 3000)
+        else:
+            self._send_cmd("AT+RST", timeout=3000, wait_for=b"ready")
+        # Discard the rest of the boot output, done as soon as the line goes quiet
+        self._drain(100, 2500)
         return self.test()
     
     def test(self):
         """Test AT command interface"""
-        resp = self._send_cmd("AT", timeout=1000)
-        return "OK" in resp
+        return self._cmd_ok("AT", timeout=1000)
+    
+    def set_baudrate(self, baudrate):
+        """
+        Change the UART speed on both the module and the Pico
+        
+        Uses AT+UART_CUR, so the module goes back to its default rate after
+        a power cycle; reset() follows it there automatically.
+        
+        Args:
+            baudrate: New rate, e.g. 921600
+        """
+        if not self._cmd_ok(self._CMD_UART_CUR % baudrate):
+            return False
+        # The module answers at the old rate and switches right after
+        self.uart.init(baudrate=baudrate)
+        self._baudrate = baudrate
+        # Anything that arrived mid-switch is garbage
+        self.uart.read()
+        return self.test()
     
     def get_version(self):
         """Get firmware version"""
@@ -103,8 +551,8 @@ class ESPicoW:
         Args:
             mode: MODE_STATION, MODE_AP, or MODE_BOTH
         """
-        resp = self._send_cmd(f"AT+CWMODE={mode}")
-        return "OK" in resp
+        self._ip_cache = None
+        return self._cmd_ok(self._CMD_CWMODE % mode)
     
     def connect(self, ssid, password, timeout=15000):
         """
@@ -115,23 +563,16 @@ class ESPicoW:
             password: Network password
             timeout: Connection timeout in ms
         """
-        # Set station mode
-        self.set_mode(self.MODE_STATION)
-        time.sleep_ms(100)
-        
-        # Connect to AP
-        cmd = f'AT+CWJAP="{ssid}","{password}"'
-        resp = self._send_cmd(cmd, timeout=timeout, wait_for="WIFI CONNECTED")
-        
-        if "WIFI CONNECTED" in resp or "OK" in resp:
-            time.sleep(1)
-            return True
-        return False
+        self._ip_cache = None
+        cmd = b"".join((self._CMD_CWJAP, ssid.encode(), b'","', password.encode(), b'"\r\n'))
+        # Station mode and join in one write; the join's OK follows
+        # WIFI GOT IP, i.e. once DHCP is done
+        return self._send_cmds((self._CMD_CWMODE % _MODE_STATION, cmd), timeout)
     
     def disconnect(self):
         """Disconnect from WiFi network"""
-        resp = self._send_cmd("AT+CWQAP")
-        return "OK" in resp
+        self._ip_cache = None
+        return self._cmd_ok("AT+CWQAP")
     
     def is_connected(self):
         """Check if connected to WiFi"""
@@ -139,81 +580,76 @@ class ESPicoW:
         return "No AP" not in resp and "ERROR" not in resp
     
     def get_ip(self):
-        """Get IP address information"""
+        """Get IP address information, cached briefly between calls"""
+        if (self._ip_cache is not None
+                and _ticks_diff(_ticks_ms(), self._ip_cache_ms) < _IP_CACHE_MS):
+            return dict(self._ip_cache)
         resp = self._send_cmd("AT+CIFSR", timeout=2000)
         
         # Parse IP addresses manually
         sta_ip = None
         ap_ip = None
         
-        lines = resp.split('\n')
-        for line in lines:
+        for line in self._iter_matching(resp, 'IP,"'):
             # Handle both CIFSR and CISFR (typo in some firmware)
+            # Extract IP between quotes
+            start = line.find('"') + 1
+            end = line.find('"', start)
+            if not start or end < 0:
+                continue
             if 'STAIP' in line or 'STIP' in line:
-                # Extract IP between quotes
-                try:
-                    if '"' in line:
-                        start = line.index('"') + 1
-                        end = line.index('"', start)
-                        sta_ip = line[start:end]
-                except:
-                    pass
+                sta_ip = line[start:end]
             elif 'APIP' in line:
-                try:
-                    if '"' in line:
-                        start = line.index('"') + 1
-                        end = line.index('"', start)
-                        ap_ip = line[start:end]
-                except:
-                    pass
+                ap_ip = line[start:end]
         
-        return {
+        self._ip_cache = {
             'station': sta_ip,
             'ap': ap_ip
         }
+        self._ip_cache_ms = _ticks_ms()
+        return dict(self._ip_cache)
     
-    def scan(self):
-        """Scan for available WiFi networks"""
-        resp = self._send_cmd("AT+CWLAP", timeout=10000)
+    def scan(self, filter_ssids=None):
+        """
+        Scan for available WiFi networks
         
-        # Parse network list manually (MicroPython's re is limited)
-        networks = []
-        lines = resp.split('\n')
+        Args:
+            filter_ssids: Optional collection of SSIDs; other networks are
+                skipped before their entries are built
+            
+        Returns:
+            Networks, which indexes and iterates like a list of dicts
+        """
+        resp = self._send_cmd("AT+CWLAP", timeout=10000)
+        networks = Networks()
         
-        for line in lines:
-            if '+CWLAP:' in line:
-                try:
-                    # Extract values between parentheses
-                    start = line.index('(') + 1
-                    end = line.rindex(')')
-                    data = line[start:end]
-                    
-                    # Split by comma, handling quoted strings
-                    parts = []
-                    current = ""
-                    in_quotes = False
-                    
-                    for char in data:
-                        if char == '"':
-                            in_quotes = not in_quotes
-                        elif char == ',' and not in_quotes:
-                            parts.append(current)
-                            current = ""
-                        else:
-                            current += char
-                    parts.append(current)
-                    
-                    if len(parts) >= 5:
-                        networks.append({
-                            'encryption': int(parts[0]),
-                            'ssid': parts[1].strip('"'),
-                            'rssi': int(parts[2]),
-                            'mac': parts[3].strip('"'),
-                            'channel': int(parts[4])
-                        })
-                except:
+        for line in self._iter_matching(resp, '+CWLAP:'):
+            m = _CWLAP_RE.search(line)
+            if m:
+                parts = (m.group(1), m.group(2), m.group(3), m.group(4), m.group(5))
+            else:
+                # Fall back to field splitting, e.g. for SSIDs containing
+                # escaped quotes in pairs; with an odd number of them the
+                # fields can't be told apart and the record is skipped
+                start = line.find('(') + 1
+                end = line.rfind(')')
+                if not start or end < start:
                     continue
-                    
+                parts = self._split_fields(line[start:end])
+            
+            if len(parts) < 5:
+                continue
+            ssid = parts[1].strip('"')
+            if filter_ssids and ssid not in filter_ssids:
+                continue
+            try:
+                encryption = int(parts[0])
+                rssi = int(parts[2])
+                channel = int(parts[4])
+            except ValueError:
+                continue
+            networks._add(encryption, ssid, rssi, parts[3].strip('"'), channel)
+        
         return networks
     
     def create_ap(self, ssid, password, channel=1, encryption=3):
@@ -226,18 +662,15 @@ class ESPicoW:
             channel: WiFi channel (1-13)
             encryption: 0=Open, 2=WPA_PSK, 3=WPA2_PSK, 4=WPA_WPA2_PSK
         """
-        self.set_mode(self.MODE_AP)
-        time.sleep_ms(100)
-        
-        cmd = f'AT+CWSAP="{ssid}","{password}",{channel},{encryption}'
-        resp = self._send_cmd(cmd, timeout=3000)
-        return "OK" in resp
+        self._ip_cache = None
+        cmd = b"".join((self._CMD_CWSAP, ssid.encode(), b'","', password.encode(),
+                        b'",%d,%d\r\n' % (channel, encryption)))
+        # Mode switch and AP setup go out together
+        return self._send_cmds((self._CMD_CWMODE % _MODE_AP, cmd), timeout=3000)
     
     def set_multiple_connections(self, enable=True):
         """Enable/disable multiple connections"""
-        mode = 1 if enable else 0
-        resp = self._send_cmd(f"AT+CIPMUX={mode}")
-        return "OK" in resp
+        return self._cmd_ok(self._CMD_CIPMUX_ON if enable else self._CMD_CIPMUX_OFF)
     
     def start_connection(self, link_id, conn_type, remote_ip, remote_port, local_port=0):
         """
@@ -250,117 +683,260 @@ class ESPicoW:
             remote_port: Remote port
             local_port: Local port (UDP only)
         """
-        if conn_type == self.TYPE_UDP and local_port > 0:
-            cmd = f'AT+CIPSTART={link_id},"{conn_type}","{remote_ip}",{remote_port},{local_port}'
-        else:
-            cmd = f'AT+CIPSTART={link_id},"{conn_type}","{remote_ip}",{remote_port}'
-            
+        cmd, info = self._cipstart(link_id, conn_type, remote_ip, remote_port, local_port)
         resp = self._send_cmd(cmd, timeout=10000)
         
         if "OK" in resp or "ALREADY CONNECTED" in resp:
-            self.connections[link_id] = {
-                'type': conn_type,
-                'ip': remote_ip,
-                'port': remote_port
-            }
+            self.connections[link_id] = info
             return True
         return False
     
+    def _cipstart(self, link_id, conn_type, remote_ip, remote_port, local_port):
+        """AT+CIPSTART command for start_connection() and the entry to record on success"""
+        type_b = conn_type.encode() if isinstance(conn_type, str) else conn_type
+        parts = [self._CMD_CIPSTART, b'%d,"' % link_id, type_b, b'","',
+                 remote_ip.encode(), b'",%d' % remote_port]
+        if type_b == _TYPE_UDP and local_port > 0:
+            parts.append(b",%d" % local_port)
+        parts.append(self._CRLF)
+        info = {
+            'type': conn_type,
+            'ip': remote_ip,
+            'port': remote_port
+        }
+        return b"".join(parts), info
+    
     def send(self, link_id, data):
         """
         Send data through connection
         
         Args:
             link_id: Connection ID
-            data: Data to send (string or bytes)
+            data: Bytes-like data (bytes, bytearray or memoryview), written
+                to the UART as is; use send_str() for text
         """
-        if isinstance(data, str):
-            data = data.encode('utf-8')
-            
-        length = len(data)
+        return self._send_mux(link_id, data)
+    
+    def send_str(self, link_id, text):
+        """Send a string through connection, UTF-8 encoded"""
+        return self._send_mux(link_id, text.encode('utf-8'))
+    
+    def _send_mux(self, link_id, data):
+        """Send data on link_id with multiple connections enabled (CIPMUX=1)"""
+        cmd = self._CMD_CIPSEND_LINK % (link_id, len(data))
+        return self._send_payload(cmd, data)
+    
+    def _send_single(self, data, wait_ack=True):
+        """Send data on the single connection (CIPMUX=0)"""
+        cmd = self._CMD_CIPSEND % len(data)
+        return self._send_payload(cmd, data, wait_ack)
+    
+    def _send_payload(self, cmd, data, wait_ack=True):
+        """
+        Issue a CIPSEND command and write data as soon as the > prompt arrives
         
-        # Send length command
-        cmd = f"AT+CIPSEND={link_id},{length}"
-        resp = self._send_cmd(cmd, timeout=1000, wait_for=">")
+        Args:
+            cmd: Complete CIPSEND command line
+            data: Payload bytes
+            wait_ack: Wait for SEND OK; otherwise return once data is written
+        """
+        if self.debug:
+            print(f"[TX] {self._decode(cmd).strip()}")
+        self.uart.write(cmd)
         
-        if ">" not in resp:
+        if not self._wait_prompt():
             return False
             
         # Send actual data
         self.uart.write(data)
-        start = time.ticks_ms()
-        response = b""
-        
-        while time.ticks_diff(time.ticks_ms(), start) < 5000:
-            if self.uart.any():
-                response += self.uart.read()
-                resp_str = response.decode('utf-8', 'ignore')
-                if "SEND OK" in resp_str:
+        if not wait_ack:
+            return True
+        
+        self._ipd_reset()
+        wait_rx = self._wait_rx
+        rx_into = self._rx_into
+        find = self._find
+        start = _ticks_ms()
+        pos = 0
+        while wait_rx(start, 5000):
+            prev = pos
+            pos = rx_into(pos)
+            if pos > prev:
+                scan_start = max(0, prev - 8)
+                if find(b"SEND OK", scan_start, pos) != -1:
                     return True
-                if "SEND FAIL" in resp_str or "ERROR" in resp_str:
+                if (find(b"SEND FAIL", scan_start, pos) != -1
+                        or find(b"ERROR", scan_start, pos) != -1):
                     return False
-            time.sleep_ms(10)
             
         return False
     
+    def _wait_prompt(self, timeout_ms=1000):
+        """
+        Wait for the > prompt that follows an accepted CIPSEND
+        
+        Reads byte by byte so nothing after the prompt is consumed, and
+        returns the moment it arrives instead of on the next poll tick.
+        Each byte goes into the same scratch buffer, so nothing is allocated.
+        +IPD payloads from other links that arrive first are skipped, so
+        their contents are never taken for the prompt or for ERROR.
+        """
+        one = self._rx1
+        readinto = self.uart.readinto
+        start = _ticks_ms()
+        err = ipd = 0  # bytes of ERROR\r\n / +IPD, matched so far
+        field = 0  # +IPD header field being read, 0 outside a header
+        skip = 0  # payload bytes left to skip
+        while self._wait_rx(start, timeout_ms):
+            while readinto(one):
+                c = one[0]
+                if skip:
+                    skip -= 1
+                    continue
+                if c == 0x3E:  # >
+                    return True
+                if field:
+                    # +IPD,length: or +IPD,link_id,length[,ip,port]:
+                    if c == 0x3A:  # :
+                        skip = n2 if field > 1 and has_n2 else n1
+                        field = 0
+                    elif c == 0x2C:  # ,
+                        if field < 3:
+                            field += 1
+                    elif 0x30 <= c <= 0x39:
+                        if field == 1:
+                            n1 = n1 * 10 + c - 0x30
+                        elif field == 2:
+                            n2 = n2 * 10 + c - 0x30
+                            has_n2 = True
+                    elif field == 2:
+                        # Not a number, so the first field was the length
+                        field = 3
+                    continue
+                err = err + 1 if c == b"ERROR\r\n"[err] else (1 if c == 0x45 else 0)
+                if err == 7:
+                    return False
+                ipd = ipd + 1 if c == b"+IPD,"[ipd] else (1 if c == 0x2B else 0)
+                if ipd == 5:
+                    ipd = 0
+                    field = 1
+                    n1 = n2 = 0
+                    has_n2 = False
+        return False
+    
     def receive(self, timeout=5000):
         """
         Receive data from connections
         
+        Data received after the returned frames is kept for the next call,
+        until another command reuses the receive buffer.
+        
         Returns:
-            List of tuples (link_id, data)
+            List of tuples (link_id, data), data as raw bytes
         """
-        start = time.ticks_ms()
-        response = b""
+        wait_rx = self._wait_rx
+        rx_into = self._rx_into
+        start = _ticks_ms()
+        pos = self._rx_tail
         received = []
+        # Frames already buffered by the previous call need no UART read
+        self._ipd_parse(pos, received)
         
-        while time.ticks_diff(time.ticks_ms(), start) < timeout:
-            if self.uart.any():
-                response += self.uart.read()
-                
-                # Parse +IPD messages manually
-                try:
-                    resp_str = response.decode('utf-8', 'ignore')
-                    
-                    # Find all +IPD messages
-                    idx = 0
-                    while True:
-                        ipd_pos = resp_str.find('+IPD,', idx)
-                        if ipd_pos == -1:
-                            break
-                        
-                        # Parse: +IPD,link_id,length:data
-                        try:
-                            comma1 = resp_str.index(',', ipd_pos)
-                            comma2 = resp_str.index(',', comma1 + 1)
-                            colon = resp_str.index(':', comma2)
-                            
-                            link_id = int(resp_str[comma1+1:comma2])
-                            length = int(resp_str[comma2+1:colon])
-                            data_start = colon + 1
-                            data = resp_str[data_start:data_start+length]
-                            
-                            received.append((link_id, data))
-                            idx = data_start + length
-                        except:
-                            break
-                            
-                except:
-                    pass
-                    
-                if received:
-                    return received
-                    
-            time.sleep_ms(10)
-            
+        while not received and wait_rx(start, timeout):
+            prev = pos
+            pos = rx_into(pos)
+            if pos > prev:
+                self._ipd_parse(pos, received)
+        
+        # Move the unparsed tail to the front for the next call
+        self._rx_tail = self._rx_compact(pos)
+        if not self._rx_tail:
+            self._rx_shrink()
         return received
     
+    def _ipd_reset(self):
+        """Restart +IPD parsing at the beginning of an empty receive buffer"""
+        self._rx_tail = 0
+        self._parse_pos = 0
+        self._ipd_end = 0
+        self._ipd_state = _IPD_SEEK
+        self._ipd_link = 0
+        self._ipd_remaining = 0
+    
+    def _rx_compact(self, pos):
+        """Discard receive buffer bytes the +IPD parser is done with, return new end"""
+        keep = self._parse_pos
+        if not keep:
+            return pos
+        n = pos - keep
+        self._rxbuf[:n] = bytes(self._rxmv[keep:pos])
+        self._parse_pos = 0
+        self._ipd_end = 0
+        return n
+    
+    def _ipd_parse(self, end, frames, copy=True):
+        """
+        Advance the +IPD parser over the receive buffer up to end
+        
+        Only bytes past the parse cursor are examined, so calling this after
+        every read keeps parsing linear in the amount of data received.
+        
+        Args:
+            end: Number of valid bytes in the receive buffer
+            frames: List that complete (link_id, data) frames are appended to
+            copy: Copy payloads out as bytes; with False they are memoryviews
+                into the receive buffer, only valid until the next read
+        """
+        find = self._find
+        while True:
+            if self._ipd_state == _IPD_SEEK:
+                idx = _scan_ipd(self._rxbuf, self._parse_pos, end)
+                if idx == -1:
+                    # Keep the tail a split "+IPD," could start in
+                    self._parse_pos = max(self._parse_pos, end - 4)
+                    return
+                self._parse_pos = idx + 5
+                self._ipd_state = _IPD_HDR
+            
+            if self._ipd_state == _IPD_HDR:
+                colon = find(b":", self._parse_pos, end)
+                if colon == -1:
+                    return
+                # +IPD,link_id,length: (CIPMUX=1) or +IPD,length: (CIPMUX=0),
+                # numbers read straight from the buffer without copies
+                buf = self._rxbuf
+                n = _atoi(buf, self._parse_pos, colon)
+                if n < 0:
+                    # Not a real header, look for the next one
+                    self._ipd_state = _IPD_SEEK
+                    continue
+                link = 0
+                comma = find(b",", self._parse_pos, colon)
+                if comma != -1 and 0x30 <= buf[comma + 1] <= 0x39:
+                    # A second number follows, so the first was the link ID
+                    link = n
+                    n = _atoi(buf, comma + 1, colon)
+                self._ipd_link = link
+                self._ipd_remaining = n
+                self._parse_pos = colon + 1
+                self._ipd_state = _IPD_BODY
+            
+            # Body: wait until the whole payload is in the buffer
+            data_end = self._parse_pos + self._ipd_remaining
+            if data_end > end:
+                return
+            data = self._rxmv[self._parse_pos:data_end]
+            frames.append((self._ipd_link, bytes(data) if copy else data))
+            self._parse_pos = data_end
+            self._ipd_end = data_end
+            self._ipd_state = _IPD_SEEK
+    
     def close(self, link_id):
         """Close connection"""
-        resp = self._send_cmd(f"AT+CIPCLOSE={link_id}")
+        ok = self._cmd_ok(self._CMD_CIPCLOSE % link_id)
         if link_id in self.connections:
             del self.connections[link_id]
-        return "OK" in resp
+        return ok
     
     def close_all(self):
         """Close all connections"""
@@ -375,13 +951,41 @@ class ESPicoW:
             url: Full URL to fetch
             
         Returns:
-            Response string or None
+            Response body as bytearray, or None on failure
         """
+        body = _Body()
+        if not self._http_get(url, timeout, body, body.reserve):
+            return None
+        return body.value()
+    
+    def http_get_stream(self, url, on_chunk, timeout=10000):
+        """
+        Perform HTTP GET request, passing the body to on_chunk as it arrives
+        
+        The body is never held in memory as a whole, so pages larger than
+        the free RAM can be processed. Chunked transfer encoding is decoded.
+        
+        Args:
+            url: Full URL to fetch
+            on_chunk: Called with each piece of the body as a memoryview
+                into the receive buffer; it is only valid during the call,
+                so copy it with bytes() to keep it. Don't call other
+                ESPicoW methods from on_chunk.
+            
+        Returns:
+            True once the response arrived (a body cut short by the
+            connection closing is passed on up to that point), False on
+            failure
+        """
+        return self._http_get(url, timeout, on_chunk, None)
+    
+    def _http_get(self, url, timeout, on_chunk, on_length):
+        """Send a GET request and stream the response body to on_chunk"""
         # Parse URL
         if url.startswith("http://"):
             url = url[7:]
         elif url.startswith("https://"):
-            return None  # HTTPS not supported directly
+            return False  # HTTPS not supported directly
             
         parts = url.split('/', 1)
         host = parts[0]
@@ -389,65 +993,126 @@ class ESPicoW:
         
         # Enable single connection mode
         self.set_multiple_connections(False)
-        time.sleep_ms(100)
         
-        # Connect
-        cmd = f'AT+CIPSTART="TCP","{host}",80'
+        # Connect, by cached IP so the ESP skips DNS on repeat requests
+        ip = self._resolve(host)
+        cmd = b"".join((self._CMD_CIPSTART, b'"TCP","', ip.encode(), b'",80\r\n'))
         resp = self._send_cmd(cmd, timeout=10000)
         
         if "OK" not in resp and "ALREADY CONNECTED" not in resp:
-            return None
+            # The address may be stale
+            self._dns_cache.pop(host, None)
+            return False
             
         # Build HTTP request
-        request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n"
-        length = len(request)
+        request = b"".join((b"GET ", path.encode(), b" HTTP/1.1\r\nHost: ", host.encode(),
+                            b"\r\nConnection: close\r\n\r\n"))
         
-        # Send request
-        cmd = f"AT+CIPSEND={length}"
-        resp = self._send_cmd(cmd, timeout=1000, wait_for=">")
+        # Send request; the response is read below, so don't consume SEND OK
+        if not self._send_single(request, wait_ack=False):
+            return False
         
-        if ">" not in resp:
-            return None
+        # Read response: headers first, then the body until it is complete
+        wait_rx = self._wait_rx
+        rx_into = self._rx_into
+        find = self._find
+        start = _ticks_ms()
+        pos = 0
+        frames = []
+        head = b""
+        sink = None
+        chunked = False
+        closed = False
+        remaining = -1
+        self._ipd_reset()
+        
+        while wait_rx(start, timeout):
+            prev = pos
+            pos = rx_into(pos)
+            if pos == prev:
+                continue
             
-        self.uart.write(request)
-        
-        # Read response
-        start = time.ticks_ms()
-        response = b""
-        
-        while time.ticks_diff(time.ticks_ms(), start) < timeout:
-            if self.uart.any():
-                response += self.uart.read()
-                
-            # Check for connection closed
-            resp_str = response.decode('utf-8', 'ignore')
-            if "CLOSED" in resp_str:
+            # Payloads go from the receive buffer straight to the sink
+            self._ipd_parse(pos, frames, False)
+            for _, data in frames:
+                if sink is None:
+                    head += bytes(data)
+                    header_end = head.find(b"\r\n\r\n")
+                    if header_end == -1:
+                        continue
+                    headers = self._decode(head[:header_end]).lower()
+                    chunked = "transfer-encoding: chunked" in headers
+                    if chunked:
+                        sink = _Dechunker(on_chunk)
+                    else:
+                        sink = on_chunk
+                        remaining = self._header_int(headers, "content-length:")
+                        if remaining >= 0 and on_length is not None:
+                            on_length(remaining)
+                    data = memoryview(head)[header_end + 4:]
+                if remaining >= 0:
+                    data = data[:remaining]
+                    remaining -= len(data)
+                if data:
+                    sink(data)
+            del frames[:]
+            
+            if remaining == 0 or (chunked and sink.done):
                 break
-                
-            time.sleep_ms(10)
             
-        # Parse HTTP response
-        resp_str = response.decode('utf-8', 'ignore')
-        if '\r\n\r\n' in resp_str:
-            return resp_str.split('\r\n\r\n', 1)[1]
-        return resp_str
+            # Outside a payload the link closing ends the response
+            if (self._ipd_state == _IPD_SEEK
+                    and find(b"CLOSED", max(self._ipd_end, prev - 5), pos) != -1):
+                closed = True
+                break
+            # Drop consumed frames so the buffer only ever holds about one
+            pos = self._rx_compact(pos)
+        
+        self._rx_shrink()
+        if not closed:
+            # Finished before the server's FIN, so the next CIPSTART
+            # can't land on this socket
+            self._cmd_ok(b"AT+CIPCLOSE")
+        return sink is not None
+    
+    def _resolve(self, host):
+        """Resolve host to an IP address, using the DNS cache when possible"""
+        if host.replace('.', '').isdigit():
+            return host
+        ip = self._dns_cache.get(host)
+        if ip is None:
+            resp = self._send_cmd(self._CMD_CIPDOMAIN + host.encode() + b'"\r\n', timeout=5000)
+            # Let CIPSTART resolve the name itself if the lookup fails
+            ip = host
+            for line in self._iter_matching(resp, '+CIPDOMAIN:'):
+                ip = line[line.index(':') + 1:].strip().strip('"')
+            self._dns_cache[host] = ip
+        return ip
+    
+    @staticmethod
+    def _header_int(headers, name):
+        """Integer value of a lower-cased header in a header block, or -1"""
+        idx = headers.find(name)
+        if idx == -1:
+            return -1
+        end = headers.find('\r\n', idx)
+        try:
+            return int(headers[idx + len(name):end if end != -1 else len(headers)])
+        except ValueError:
+            return -1
     
     def ping(self, host):
         """Ping a host"""
-        resp = self._send_cmd(f'AT+PING="{host}"', timeout=5000)
+        resp = self._send_cmd(self._CMD_PING + host.encode() + b'"\r\n', timeout=5000)
         
         # Parse ping time manually
         # Look for +<number> pattern
-        if '+' in resp:
-            try:
-                lines = resp.split('\n')
-                for line in lines:
-                    if line.strip().startswith('+'):
-                        # Extract number after +
-                        num_str = line.strip()[1:].split()[0]
-                        return int(num_str)
-            except:
-                pass
+        for line in resp.split('\n'):
+            line = line.strip()
+            # Extract number after +
+            num_str = line[1:].split()[0] if line.startswith('+') and len(line) > 1 else ''
+            if num_str.isdigit():
+                return int(num_str)
         return None
     
     def get_connection_status(self):
@@ -455,38 +1120,29 @@ class ESPicoW:
         resp = self._send_cmd("AT+CIPSTATUS")
         
         statuses = []
-        lines = resp.split('\n')
         
-        for line in lines:
-            if '+CIPSTATUS:' in line:
-                try:
-                    # Parse: +CIPSTATUS:link_id,"type","remote_ip",remote_port,local_port,tetype
-                    start = line.index(':') + 1
-                    parts = []
-                    current = ""
-                    in_quotes = False
-                    
-                    for char in line[start:]:
-                        if char == '"':
-                            in_quotes = not in_quotes
-                        elif char == ',' and not in_quotes:
-                            parts.append(current)
-                            current = ""
-                        else:
-                            current += char
-                    parts.append(current)
-                    
-                    if len(parts) >= 6:
-                        statuses.append({
-                            'link_id': int(parts[0]),
-                            'type': parts[1].strip('"'),
-                            'remote_ip': parts[2].strip('"'),
-                            'remote_port': int(parts[3]),
-                            'local_port': int(parts[4]),
-                            'tetype': int(parts[5])
-                        })
-                except:
-                    continue
+        for line in self._iter_matching(resp, '+CIPSTATUS:'):
+            # Parse: +CIPSTATUS:link_id,"type","remote_ip",remote_port,local_port,tetype
+            m = _CIPSTATUS_RE.search(line)
+            if m:
+                parts = (m.group(1), m.group(2), m.group(3),
+                         m.group(4), m.group(5), m.group(6))
+            else:
+                parts = self._split_fields(line[line.find(':') + 1:])
+            
+            if len(parts) < 6:
+                continue
+            try:
+                statuses.append({
+                    'link_id': int(parts[0]),
+                    'type': parts[1].strip('"'),
+                    'remote_ip': parts[2].strip('"'),
+                    'remote_port': int(parts[3]),
+                    'local_port': int(parts[4]),
+                    'tetype': int(parts[5])
+                })
+            except ValueError:
+                continue
             
         return statuses
     
@@ -497,8 +1153,7 @@ class ESPicoW:
         Args:
             mode: 0=disable, 1=light sleep, 2=modem sleep
         """
-        resp = self._send_cmd(f"AT+SLEEP={mode}")
-        return "OK" in resp
+        return self._cmd_ok(self._CMD_SLEEP % mode)
     
     def enable_dhcp(self, mode, enable=True):
         """
@@ -508,6 +1163,203 @@ class ESPicoW:
             mode: 0=softAP, 1=station, 2=both
             enable: True to enable, False to disable
         """
+        self._ip_cache = None
         en = 1 if enable else 0
-        resp = self._send_cmd(f"AT+CWDHCP={mode},{en}")
+        return self._cmd_ok(self._CMD_CWDHCP % (mode, en))
+    
+    def start_async(self):
+        """
+        Start the background UART reader used by the *_async methods
+        
+        Must be called with an asyncio event loop running. The reader task
+        owns the UART: +IPD payloads are queued per link for receive_async()
+        and everything else is routed to the pending command. Don't call
+        the blocking methods until stop_async() has been called.
+        """
+        if self._rx_task is not None:
+            return
+        self._sreader = asyncio.StreamReader(self.uart)
+        self._cmd_lock = asyncio.Lock()
+        self._cmd_event = asyncio.Event()
+        self._rx_event = asyncio.Event()
+        self._rx_pending = []
+        self._rx_size = 0
+        self._rx_need = 0
+        self._rx_task = asyncio.create_task(self._rx_loop())
+    
+    def stop_async(self):
+        """Stop the background UART reader"""
+        if self._rx_task is not None:
+            self._rx_task.cancel()
+            self._rx_task = None
+    
+    async def _rx_loop(self):
+        """Read the UART for as long as the async interface is active"""
+        while True:
+            data = await self._sreader.read(256)
+            if data:
+                self._rx_dispatch(data)
+    
+    def _rx_dispatch(self, data):
+        """Split incoming bytes into +IPD payloads and command response lines"""
+        # Collect reads without copying until a partial +IPD payload is complete
+        chunks = self._rx_pending
+        chunks.append(data)
+        self._rx_size += len(data)
+        if self._rx_size < self._rx_need:
+            return
+        pending = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        need = 0
+        while pending:
+            if pending.startswith(b"+IPD,"):
+                colon = pending.find(b":")
+                if colon == -1:
+                    break
+                # +IPD,link_id,length: (CIPMUX=1) or +IPD,length: (CIPMUX=0)
+                fields = pending[5:colon].split(b",")
+                try:
+                    if len(fields) > 1 and not fields[1].startswith(b'"'):
+                        link_id = int(fields[0])
+                        length = int(fields[1])
+                    else:
+                        link_id = 0
+                        length = int(fields[0])
+                except ValueError:
+                    pending = pending[5:]
+                    continue
+                end = colon + 1 + length
+                if len(pending) < end:
+                    need = end
+                    break
+                self._link_data.setdefault(link_id, []).append(pending[colon + 1:end])
+                self._rx_event.set()
+                pending = pending[end:]
+            elif pending.startswith(b">"):
+                # CIPSEND prompt, not followed by a line ending
+                self._cmd_lines.append(b">")
+                self._cmd_event.set()
+                pending = pending[1:]
+            else:
+                nl = pending.find(b"\n")
+                # A frame can follow a partial line, e.g. the space after ">"
+                ipd = pending.find(b"+IPD,", 0, len(pending) if nl == -1 else nl)
+                if ipd != -1:
+                    line = pending[:ipd]
+                    pending = pending[ipd:]
+                elif nl == -1:
+                    break
+                else:
+                    line = pending[:nl + 1]
+                    pending = pending[nl + 1:]
+                if line.strip():
+                    self._cmd_lines.append(line)
+                    self._cmd_event.set()
+        self._rx_pending = [pending] if pending else []
+        self._rx_size = len(pending)
+        self._rx_need = need
+    
+    async def _wait_lines(self, tokens, timeout):
+        """
+        Wait until a command response line contains one of tokens
+        
+        Returns:
+            The matching token, or None on timeout
+        """
+        start = _ticks_ms()
+        checked = 0
+        while True:
+            lines = self._cmd_lines
+            while checked < len(lines):
+                for token in tokens:
+                    if token in lines[checked]:
+                        return token
+                checked += 1
+            remaining = timeout - _ticks_diff(_ticks_ms(), start)
+            if remaining <= 0:
+                return None
+            self._cmd_event.clear()
+            try:
+                await asyncio.wait_for_ms(self._cmd_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+    
+    async def _send_cmd_async(self, cmd, timeout=None, wait_for=b"OK"):
+        """Async counterpart of _send_cmd; requires start_async()"""
+        if timeout is None:
+            timeout = self._cmd_timeout()
+        if isinstance(cmd, str):
+            cmd = cmd.encode()
+        if not cmd.endswith(self._CRLF):
+            cmd += self._CRLF
+        if isinstance(wait_for, str):
+            wait_for = wait_for.encode()
+        
+        async with self._cmd_lock:
+            self._cmd_lines = []
+            if self.debug:
+                print(f"[TX] {self._decode(cmd).strip()}")
+            self.uart.write(cmd)
+            await self._wait_lines((wait_for, b"ERROR", b"FAIL"), timeout)
+            resp_str = self._decode(b"".join(self._cmd_lines))
+            if self.debug:
+                print(f"[RX] {resp_str}")
+            return resp_str
+    
+    async def set_multiple_connections_async(self, enable=True):
+        """Async counterpart of set_multiple_connections()"""
+        resp = await self._send_cmd_async(self._CMD_CIPMUX_ON if enable else self._CMD_CIPMUX_OFF)
         return "OK" in resp
+    
+    async def start_connection_async(self, link_id, conn_type, remote_ip, remote_port, local_port=0):
+        """
+        Async counterpart of start_connection()
+        
+        The event loop keeps running while the module connects, which
+        can take seconds for a remote host.
+        """
+        cmd, info = self._cipstart(link_id, conn_type, remote_ip, remote_port, local_port)
+        resp = await self._send_cmd_async(cmd, timeout=10000)
+        
+        if "OK" in resp or "ALREADY CONNECTED" in resp:
+            self.connections[link_id] = info
+            return True
+        return False
+    
+    async def send_async(self, link_id, data):
+        """
+        Send data through connection without blocking the event loop
+        
+        Args:
+            link_id: Connection ID
+            data: Bytes-like data, as for send()
+        """
+        cmd = self._CMD_CIPSEND_LINK % (link_id, len(data))
+        
+        async with self._cmd_lock:
+            self._cmd_lines = []
+            self.uart.write(cmd)
+            if await self._wait_lines((b">", b"ERROR"), 1000) != b">":
+                return False
+            self.uart.write(data)
+            return await self._wait_lines((b"SEND OK", b"SEND FAIL", b"ERROR"), 5000) == b"SEND OK"
+    
+    async def receive_async(self, link_id, timeout=5000):
+        """
+        Wait for data on a connection
+        
+        Returns:
+            Payload bytes, or None on timeout
+        """
+        start = _ticks_ms()
+        while True:
+            queue = self._link_data.get(link_id)
+            if queue:
+                return queue.pop(0)
+            remaining = timeout - _ticks_diff(_ticks_ms(), start)
+            if remaining <= 0:
+                return None
+            self._rx_event.clear()
+            try:
+                await asyncio.wait_for_ms(self._rx_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
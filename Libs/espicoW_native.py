@@ -0,0 +1,56 @@
+"""
+espicoW_native.py - Native code helpers for espicoW
+Optional companion to espicoW.py: byte scanners compiled with the viper
+emitter. espicoW falls back to pure Python if this module is missing or
+the firmware was built without viper support.
+"""
+
+import micropython
+
+
+@micropython.viper
+def scan_ipd(buf: ptr8, start: int, end: int) -> int:
+    # Index of b"+IPD," in buf[start:end], or -1
+    i = start
+    last = end - 5
+    while i <= last:
+        if buf[i] == 0x2B and buf[i + 1] == 0x49 and buf[i + 2] == 0x50 \
+                and buf[i + 3] == 0x44 and buf[i + 4] == 0x2C:
+            return i
+        i += 1
+    return -1
+
+
+@micropython.viper
+def find(buf: ptr8, start: int, end: int, needle) -> int:
+    # Index of needle in buf[start:end], or -1, without copying the window
+    n = int(len(needle))
+    pat = ptr8(needle)
+    first = pat[0]
+    i = start
+    last = end - n
+    while i <= last:
+        if buf[i] == first:
+            j = 1
+            while j < n and buf[i + j] == pat[j]:
+                j += 1
+            if j == n:
+                return i
+        i += 1
+    return -1
+
+
+@micropython.viper
+def atoi(buf: ptr8, start: int, end: int) -> int:
+    # Decimal number at the start of buf[start:end], or -1 if there is none
+    i = start
+    n = 0
+    while i < end:
+        c = int(buf[i])
+        if c < 0x30 or c > 0x39:
+            break
+        n = n * 10 + c - 0x30
+        i += 1
+    if i == start:
+        return -1
+    return n
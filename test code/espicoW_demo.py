@@ -4,7 +4,33 @@ All examples tested and working on RP2040 + ESP8285
 """
 
 from espicoW import ESPicoW
-import time
+import asyncio
+import re
+
+# Compiled once; each search is a single pass in C
+_TITLE_RE = re.compile(b'<title>([^<]*)</title>')
+_ORIGIN_RE = re.compile(b'"origin": *"([^"]*)"')
+# Encryption names indexed by the AT+CWLAP code
+_ENC_NAMES = ("Open", "WEP", "WPA", "WPA2", "WPA/2")
+
+class TitleFinder:
+    """Finds <title> in a streamed page, keeping only a short tail of it"""
+    KEEP = 256
+    
+    def __init__(self):
+        self.window = b""
+        self.title = None
+        self.size = 0
+    
+    def __call__(self, chunk):
+        self.size += len(chunk)
+        if self.title is None:
+            # The tail covers a title split across two chunks
+            self.window = self.window[-self.KEEP:] + bytes(chunk)
+            m = _TITLE_RE.search(self.window)
+            if m:
+                self.title = m.group(1).decode()
+                self.window = b""
 
 # Initialize WiFi module
 print("=" * 60)
@@ -32,11 +58,11 @@ print("\n2. Scanning for WiFi networks...")
 networks = wifi.scan()
 if networks:
     print(f"   Found {len(networks)} networks:")
-    networks.sort(key=lambda x: x['rssi'], reverse=True)
+    networks.sort('rssi', reverse=True)
     
-    enc_names = {0: "Open", 1: "WEP", 2: "WPA", 3: "WPA2", 4: "WPA/2"}
     for i, net in enumerate(networks[:3], 1):
-        enc = enc_names.get(net['encryption'], "Unknown")
+        code = net['encryption']
+        enc = _ENC_NAMES[code] if code < len(_ENC_NAMES) else "Unknown"
         print(f"   {i}. {net['ssid']:<20} {net['rssi']:>4}dBm  Ch:{net['channel']:>2}  {enc}")
 
 # Test 3: Connect to WiFi
@@ -59,15 +85,12 @@ else:
 print("\n4. Testing HTTP GET request...")
 print("   Fetching http://example.com...")
 
-response = wifi.http_get("http://example.com")
-if response:
-    # Extract title from HTML
-    if '<title>' in response:
-        start = response.index('<title>') + 7
-        end = response.index('</title>')
-        title = response[start:end]
-        print(f"   ✓ Page title: {title}")
-    print(f"   Response size: {len(response)} bytes")
+# Streamed, so the page is never held in memory as a whole
+finder = TitleFinder()
+if wifi.http_get_stream("http://example.com", finder):
+    if finder.title is not None:
+        print(f"   ✓ Page title: {finder.title}")
+    print(f"   Response size: {finder.size} bytes")
 
 # Test 5: Fetch JSON data
 print("\n5. Testing JSON API...")
@@ -75,12 +98,11 @@ print("   Fetching IP info from httpbin.org...")
 
 response = wifi.http_get("http://httpbin.org/ip")
 if response:
+    response = bytes(response)
     # Try to extract IP from response
-    if '"origin":' in response:
-        start = response.index('"origin":') + 10
-        end = response.index('"', start)
-        ip = response[start:end]
-        print(f"   ✓ Your public IP: {ip}")
+    m = _ORIGIN_RE.search(response)
+    if m:
+        print(f"   ✓ Your public IP: {m.group(1).decode()}")
 
 # Test 6: TCP connection example
 print("\n6. Testing TCP connection...")
@@ -91,11 +113,10 @@ if wifi.start_connection(0, wifi.TYPE_TCP, "example.com", 80):
     
     # Send HTTP request
     request = "GET / HTTP/1.1\r\nHost: example.com\r\nConnection: close\r\n\r\n"
-    if wifi.send(0, request):
+    if wifi.send_str(0, request):
         print("   ✓ HTTP request sent")
         
-        # Receive response
-        time.sleep(1)
+        # Receive response (blocks until data arrives)
         data = wifi.receive(timeout=3000)
         
         if data:
@@ -103,10 +124,10 @@ if wifi.start_connection(0, wifi.TYPE_TCP, "example.com", 80):
             print(f"   ✓ Received {total_bytes} bytes")
             
             # Show first line of response
-            first_data = data[0][1] if data else ""
-            if 'HTTP' in first_data:
-                first_line = first_data.split('\r\n')[0]
-                print(f"   Response: {first_line}")
+            first_data = data[0][1] if data else b""
+            if b'HTTP' in first_data:
+                first_line = first_data.split(b'\r\n')[0]
+                print(f"   Response: {first_line.decode()}")
 
 # Test 7: Weather example (if you want to try)
 print("\n7. Fetching weather data...")
@@ -114,14 +135,7 @@ print("   Using wttr.in service...")
 
 weather = wifi.http_get("http://wttr.in/Dhaka?format=%l:+%c+%t")
 if weather and len(weather) > 0:
-    # Clean up the response
-    weather = weather.replace('SEND OK', '').strip()
-    if '+IPD' in weather:
-        # Extract actual data after +IPD
-        parts = weather.split(':')
-        if len(parts) > 1:
-            weather = parts[-1].strip()
-    print(f"   Weather: {weather}")
+    print(f"   Weather: {weather.decode().strip()}")
 
 # Test 8: Get connection status
 print("\n8. Checking connection status...")
@@ -134,8 +148,32 @@ ip_info = wifi.get_ip()
 print(f"   Station IP: {ip_info['station']}")
 print(f"   Connected: {wifi.is_connected()}")
 
+# Test 10: Same TCP exchange through the async interface
+print("\n10. Testing async TCP connection...")
+
+async def async_tcp_demo():
+    # The reader task owns the UART until stop_async()
+    wifi.start_async()
+    try:
+        await wifi.set_multiple_connections_async(True)
+        if not await wifi.start_connection_async(1, wifi.TYPE_TCP, "example.com", 80):
+            print("   ✗ Async connection failed")
+            return
+        print("   ✓ TCP connection established")
+        
+        request = b"GET / HTTP/1.1\r\nHost: example.com\r\nConnection: close\r\n\r\n"
+        if await wifi.send_async(1, request):
+            data = await wifi.receive_async(1, timeout=3000)
+            if data:
+                first_line = data.split(b'\r\n')[0]
+                print(f"   Response: {first_line.decode()}")
+    finally:
+        wifi.stop_async()
+
+asyncio.run(async_tcp_demo())
+
 # Cleanup
-print("\n10. Cleaning up...")
+print("\n11. Cleaning up...")
 wifi.close_all()
 print("   ✓ All connections closed")
 
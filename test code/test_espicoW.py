@@ -4,6 +4,7 @@ Tests all major functionality of the WiFi library
 """
 
 from espicoW import ESPicoW
+from array import array
 import time
 
 # Configuration - CHANGE THESE TO MATCH YOUR SETUP
@@ -18,19 +19,22 @@ TEST_TCP_HOST = "example.com"
 TEST_TCP_PORT = 80
 TEST_PING_HOST = "8.8.8.8"
 
+# Encryption names indexed by the AT+CWLAP code
+ENC_TYPES = ("Open", "WEP", "WPA", "WPA2", "WPA/2")
+
 class TestResult:
-    """Track test results"""
+    """Track test results, one entry per test across parallel lists"""
     def __init__(self):
         self.passed = 0
         self.failed = 0
-        self.tests = []
+        self.names = []
+        self.outcomes = array('b')
+        self.messages = []
     
     def add(self, name, passed, message=""):
-        self.tests.append({
-            'name': name,
-            'passed': passed,
-            'message': message
-        })
+        self.names.append(name)
+        self.outcomes.append(1 if passed else 0)
+        self.messages.append(message)
         if passed:
             self.passed += 1
         else:
@@ -41,10 +45,10 @@ class TestResult:
         print("TEST SUMMARY")
         print("=" * 70)
         
-        for test in self.tests:
-            status = "✓ PASS" if test['passed'] else "✗ FAIL"
-            msg = f" - {test['message']}" if test['message'] else ""
-            print(f"{status}: {test['name']}{msg}")
+        for name, passed, message in zip(self.names, self.outcomes, self.messages):
+            status = "✓ PASS" if passed else "✗ FAIL"
+            msg = f" - {message}" if message else ""
+            print(f"{status}: {name}{msg}")
         
         print("=" * 70)
         total = self.passed + self.failed
@@ -52,6 +56,27 @@ class TestResult:
         print(f"Results: {self.passed}/{total} passed ({percentage:.1f}%)")
         print("=" * 70)
 
+def http_response_size(data):
+    """
+    Full size of an HTTP response from its Content-Length header
+    
+    Returns:
+        Size in bytes, -1 while the headers are incomplete, or None
+        without a Content-Length (the server closing ends the response)
+    """
+    header_end = data.find(b"\r\n\r\n")
+    if header_end == -1:
+        return -1
+    headers = data[:header_end].lower()
+    idx = headers.find(b"content-length:")
+    if idx == -1:
+        return None
+    end = headers.find(b"\r\n", idx)
+    try:
+        return header_end + 4 + int(headers[idx + 15:end if end != -1 else len(headers)])
+    except ValueError:
+        return None
+
 def print_test_header(title):
     """Print formatted test section header"""
     print("\n" + "-" * 70)
@@ -115,7 +140,6 @@ def test_wifi_modes(wifi, results):
         else:
             print(f"  ✗ Failed to set {name} mode")
             results.add(f"Set {name} Mode", False)
-        time.sleep_ms(500)
 
 def test_network_scan(wifi, results):
     """Test 3: Network scanning"""
@@ -130,15 +154,15 @@ def test_network_scan(wifi, results):
         
         # Display top 5 networks
         print("\n  Top networks by signal strength:")
-        networks.sort(key=lambda x: x['rssi'], reverse=True)
+        networks.sort('rssi', reverse=True)
         
-        enc_types = {0: "Open", 1: "WEP", 2: "WPA", 3: "WPA2", 4: "WPA/2"}
         for i, net in enumerate(networks[:5], 1):
-            enc = enc_types.get(net['encryption'], "?")
+            code = net['encryption']
+            enc = ENC_TYPES[code] if code < len(ENC_TYPES) else "?"
             print(f"    {i}. {net['ssid']:<25} {net['rssi']:>4} dBm  Ch:{net['channel']:>2}  {enc}")
         
         # Check if our target SSID is visible
-        target_found = any(net['ssid'] == WIFI_SSID for net in networks)
+        target_found = WIFI_SSID in networks.ssids
         if target_found:
             print(f"\n  ✓ Target network '{WIFI_SSID}' is visible")
             results.add("Target Network Visible", True)
@@ -155,7 +179,6 @@ def test_wifi_connection(wifi, results):
     
     # Ensure station mode
     wifi.set_mode(wifi.MODE_STATION)
-    time.sleep_ms(500)
     
     print(f"Connecting to '{WIFI_SSID}'...")
     start_time = time.ticks_ms()
@@ -210,8 +233,6 @@ def test_ping(wifi, results):
         else:
             print(f"  ✗ Ping failed or timeout")
             results.add(f"Ping {name}", False, "No response")
-        
-        time.sleep(1)
 
 def test_http_get(wifi, results):
     """Test 6: HTTP GET requests"""
@@ -235,15 +256,13 @@ def test_http_get(wifi, results):
             print(f"    Response size: {len(response)} bytes")
             
             # Show preview
-            preview = response[:100].replace('\n', ' ').replace('\r', '')
+            preview = bytes(response[:100]).replace(b'\n', b' ').replace(b'\r', b'')
             print(f"    Preview: {preview}...")
             
             results.add(f"HTTP GET {name}", True, f"{len(response)} bytes in {elapsed:.1f}s")
         else:
             print(f"  ✗ Request failed")
             results.add(f"HTTP GET {name}", False, "No response or error")
-        
-        time.sleep(1)
 
 def test_tcp_connection(wifi, results):
     """Test 7: TCP connection"""
@@ -259,8 +278,6 @@ def test_tcp_connection(wifi, results):
         results.add("Enable Multiple Connections", False)
         return
     
-    time.sleep_ms(500)
-    
     # Test TCP connection
     print(f"Connecting to {TEST_TCP_HOST}:{TEST_TCP_PORT}...")
     
@@ -272,24 +289,34 @@ def test_tcp_connection(wifi, results):
         print("Sending HTTP request...")
         request = f"GET / HTTP/1.1\r\nHost: {TEST_TCP_HOST}\r\nConnection: close\r\n\r\n"
         
-        if wifi.send(0, request):
+        if wifi.send_str(0, request):
             print("  ✓ Data sent successfully")
             results.add("TCP Send Data", True)
             
             # Receive response
             print("Receiving response...")
             start_time = time.ticks_ms()
-            response = ""
+            response_parts = []
+            total = 0
+            expected = -1
             
             while time.ticks_diff(time.ticks_ms(), start_time) < 10000:
                 data = wifi.receive(timeout=1000)
-                if data:
-                    for link_id, content in data:
-                        response += content
+                if not data and total:
+                    # Nothing more for a second, the server is done
+                    break
+                for link_id, content in data:
+                    response_parts.append(content)
+                    total += len(content)
                 
-                if "CLOSED" in response or len(response) > 1000:
+                # Stop as soon as Content-Length bytes are in instead of
+                # waiting for the server to close the connection
+                if expected == -1 and response_parts:
+                    expected = http_response_size(b"".join(response_parts))
+                if expected is not None and 0 <= expected <= total:
                     break
             
+            response = b"".join(response_parts)
             if len(response) > 0:
                 print(f"  ✓ Received {len(response)} bytes")
                 results.add("TCP Receive Data", True, f"{len(response)} bytes")
@@ -349,8 +376,6 @@ def test_disconnect(wifi, results):
         print("  ✓ Disconnected successfully")
         results.add("WiFi Disconnect", True)
         
-        time.sleep(1)
-        
         # Verify disconnection
         if not wifi.is_connected():
             print("  ✓ Disconnection verified")